@@ -1,14 +1,16 @@
 import json
 import boto3
-import random
+import secrets
 import string
 import cfnresponse
 
+# The RAG handler only accepts alphanumeric keys, so token_urlsafe's - and _ are excluded
+_ALPHABET = string.ascii_letters + string.digits
+
 
 def generate_random_key(length=32):
     """Generate cryptographically secure random API key."""
-    characters = string.ascii_letters + string.digits
-    return ''.join(random.SystemRandom().choice(characters) for _ in range(length))
+    return ''.join(secrets.choice(_ALPHABET) for _ in range(length))
 
 
 def handler(event, context):
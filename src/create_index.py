@@ -1,65 +1,253 @@
 import os
-import uuid
+import gzip
 import json
+import asyncio
+import hashlib
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import aioboto3
 import boto3
-from langchain_aws.embeddings import BedrockEmbeddings
+import numpy as np
+from botocore.config import Config
 from langchain_text_splitters import MarkdownTextSplitter
-from tqdm import tqdm
+from tqdm.asyncio import tqdm_asyncio
 
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+EMBED_CONCURRENCY = 16
+CACHE_MAX_WORKERS = 32
+PUT_BATCH_SIZE = 500
+PUT_MAX_WORKERS = 4
+MIN_CHUNK_SIZE = 100
+MAX_MERGED_SIZE = 1150
+MAX_CHUNK_SIZE = 1100
+CACHE_PREFIX = "embeddings"
+# Validation errors caused by the batch (duplicate keys, request limits) rather than its vectors
+SPLITTABLE_ERROR_RE = re.compile(r"duplicate|too many|request (?:size|payload|entity)", re.IGNORECASE)
 
-def create_index(source_text: str, title: str) -> None:
-    """Create vector index from source text."""
-    
-    # Initialize Bedrock client and embedding model
-    bedrock_client = boto3.client("bedrock-runtime", "us-east-1")
-    embedding_model = BedrockEmbeddings(
-        client=bedrock_client,
-        model_id="amazon.titan-embed-text-v2:0",
-    )
-    
-    # Split text into chunks
+
+def batched(items: List, n: int) -> Iterator[List]:
+    """Yield successive slices of at most n items."""
+    for i in range(0, len(items), n):
+        yield items[i:i + n]
+
+
+def embedding_cache_key(chunk: str) -> str:
+    """Build the S3 object key for a chunk's cached embedding."""
+    digest = hashlib.sha256(f"{EMBEDDING_MODEL_ID}\0{chunk}".encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}/{digest}.f32.gz"
+
+
+def load_cached_embedding(s3_client, bucket: str, chunk: str) -> Optional[List[float]]:
+    """Fetch a cached embedding from S3, returning None on a miss."""
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=embedding_cache_key(chunk))
+        body = gzip.decompress(response["Body"].read())
+        # Parse float32's shortest reprs so PutVectors JSON doesn't carry 17-digit float64 ones
+        return np.frombuffer(body, dtype=np.float32).astype(str).astype(np.float64).tolist()
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    except Exception as e:
+        print(f"Error reading cached embedding: {e}")
+        return None
+
+
+def store_cached_embedding(s3_client, bucket: str, chunk: str, embedding: List[float]) -> None:
+    """Persist an embedding to S3 as gzip'd float32 bytes."""
+    try:
+        s3_client.put_object(
+            Bucket=bucket,
+            Key=embedding_cache_key(chunk),
+            Body=gzip.compress(np.asarray(embedding, dtype=np.float32).tobytes()),
+        )
+    except Exception as e:
+        print(f"Error caching embedding: {e}")
+
+
+def merge_small_chunks(chunks: List[str]) -> List[str]:
+    """Fold chunks under MIN_CHUNK_SIZE into their neighbour when the result stays small."""
+    merged: List[str] = []
+    for chunk in chunks:
+        if merged:
+            previous = merged[-1]
+            is_tiny = len(previous) < MIN_CHUNK_SIZE or len(chunk) < MIN_CHUNK_SIZE
+            if is_tiny and len(previous) + len(chunk) < MAX_MERGED_SIZE:
+                merged[-1] = f"{previous}\n\n{chunk}"
+                continue
+        merged.append(chunk)
+    return merged
+
+
+def split_text(source_text: str) -> List[str]:
+    """Split a single document into Markdown-aware chunks."""
     text_splitter = MarkdownTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
         length_function=len,
     )
-    chunks = text_splitter.split_text(source_text)
     
-    print(f"● Split text into {len(chunks)} chunks")
+    # Merge headings and stray lines into neighbouring chunks so each embedding
+    # call carries useful context, then re-split anything that grew too large
+    chunks = merge_small_chunks(text_splitter.split_text(source_text))
+    return list(chain.from_iterable(
+        text_splitter.split_text(chunk) if len(chunk) > MAX_CHUNK_SIZE else [chunk]
+        for chunk in chunks
+    ))
+
+
+def split_documents(texts: List[str]) -> List[List[str]]:
+    """Split several documents, using one process per core where available."""
+    if len(texts) < 2:
+        return [split_text(text) for text in texts]
+    
+    # Splitting is pure Python, so processes rather than threads sidestep the GIL.
+    # Lambda has no /dev/shm for multiprocessing primitives, so fall back to serial.
+    try:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(split_text, texts))
+    except (OSError, NotImplementedError) as e:
+        print(f"Parallel splitting unavailable, splitting serially: {e}")
+        return [split_text(text) for text in texts]
+
+
+def vector_key(chunk: str, title: str) -> str:
+    """Derive a deterministic vector key from a chunk and its document title."""
+    return hashlib.blake2b(f"{title}\0{chunk}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def put_vector_batch(s3vectors_client, bucket: str, index: str, batch: List[Dict]) -> int:
+    """Store a batch of vectors, halving it on batch-limit errors; returns the stored count."""
+    try:
+        s3vectors_client.put_vectors(
+            vectorBucketName=bucket,
+            indexName=index,
+            vectors=batch,
+        )
+        return len(batch)
+    except s3vectors_client.exceptions.ValidationException as e:
+        # Errors such as a dimension mismatch affect every vector, so splitting would only repeat them
+        message = e.response.get("Error", {}).get("Message", "")
+        if len(batch) == 1 or not SPLITTABLE_ERROR_RE.search(message):
+            raise
+        mid = len(batch) // 2
+        return (
+            put_vector_batch(s3vectors_client, bucket, index, batch[:mid])
+            + put_vector_batch(s3vectors_client, bucket, index, batch[mid:])
+        )
+
+
+async def embed_chunks(texts: List[str]) -> List[Optional[List[float]]]:
+    """Embed chunks concurrently, returning None for any chunk that fails."""
+    # Bound in-flight requests to stay within Bedrock's per-region TPS quota
+    semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+    session = aioboto3.Session()
+    
+    async with session.client(
+        "bedrock-runtime",
+        "us-east-1",
+        config=Config(max_pool_connections=EMBED_CONCURRENCY),
+    ) as bedrock_client:
+        
+        async def embed(text: str) -> Optional[List[float]]:
+            async with semaphore:
+                try:
+                    response = await bedrock_client.invoke_model(
+                        modelId=EMBEDDING_MODEL_ID,
+                        contentType="application/json",
+                        accept="application/json",
+                        body=json.dumps({"inputText": text}),
+                    )
+                    response_body = json.loads(await response["body"].read())
+                    return response_body["embedding"]
+                except Exception as e:
+                    print(f"Error creating embedding for chunk: {e}")
+                    return None
+        
+        return await tqdm_asyncio.gather(*(embed(text) for text in texts))
+
+
+def create_index(documents: List[Tuple[str, str]]) -> None:
+    """Create vector index from (source_text, title) documents."""
+    
+    # Split text into chunks, remembering which document each chunk came from
+    split_chunks = split_documents([source_text for source_text, _ in documents])
+    chunks = list(chain.from_iterable(split_chunks))
+    titles = list(chain.from_iterable(
+        [title] * len(doc_chunks) for (_, title), doc_chunks in zip(documents, split_chunks)
+    ))
+    
+    print(f"● Split {len(documents)} documents into {len(chunks)} chunks")
+    
+    # Look up previously computed embeddings so unchanged chunks skip Bedrock
+    embeddings: List[Optional[List[float]]] = [None] * len(chunks)
+    cache_bucket = os.environ.get("EMBEDDING_CACHE_BUCKET")
+    s3_client = boto3.client(
+        "s3", "us-east-1", config=Config(max_pool_connections=CACHE_MAX_WORKERS)
+    ) if cache_bucket else None
+    
+    if s3_client:
+        with ThreadPoolExecutor(max_workers=CACHE_MAX_WORKERS) as executor:
+            embeddings = list(executor.map(
+                lambda chunk: load_cached_embedding(s3_client, cache_bucket, chunk),
+                chunks,
+            ))
+        cached_count = sum(embedding is not None for embedding in embeddings)
+        print(f"● Reused {cached_count} cached embeddings")
     
     # Create vectors from chunks
-    vectors = []
     print("● Creating vectors from source text...")
     
-    for chunk in tqdm(chunks):
-        try:
-            embedding = embedding_model.embed_query(chunk)
-            vectors.append({
-                "key": str(uuid.uuid4()),
-                "data": {
-                    "float32": embedding,
-                },
-                "metadata": {
-                    "text": chunk,
-                    "title": title,
-                },
-            })
-        except Exception as e:
-            print(f"Error creating embedding for chunk: {e}")
+    uncached = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    fresh = []
+    results = asyncio.run(embed_chunks([chunks[i] for i in uncached]))
+    for i, embedding in zip(uncached, results):
+        if embedding is not None:
+            embeddings[i] = embedding
+            fresh.append(i)
+    
+    if s3_client and fresh:
+        with ThreadPoolExecutor(max_workers=CACHE_MAX_WORKERS) as executor:
+            list(executor.map(
+                lambda i: store_cached_embedding(s3_client, cache_bucket, chunks[i], embeddings[i]),
+                fresh,
+            ))
+    
+    # Content-hash keys make re-ingestion idempotent; S3 Vectors also rejects
+    # duplicate keys within one PutVectors call, so keep the last of each
+    unique_vectors = {}
+    for chunk, title, embedding in zip(chunks, titles, embeddings):
+        if embedding is None:
             continue
+        key = vector_key(chunk, title)
+        unique_vectors[key] = {
+            "key": key,
+            "data": {
+                "float32": embedding,
+            },
+            "metadata": {
+                "text": chunk,
+                "title": title,
+            },
+        }
+    vectors = list(unique_vectors.values())
     
-    # Store vectors in S3 Vectors
+    # Store vectors in S3 Vectors, within the per-request limit
     s3vectors_client = boto3.client("s3vectors", "us-east-1")
+    bucket = os.environ["VECTOR_BUCKET_NAME"]
+    index = os.environ["VECTOR_INDEX_NAME"]
     
     try:
-        s3vectors_client.put_vectors(
-            vectorBucketName=os.environ["VECTOR_BUCKET_NAME"],
-            indexName=os.environ["VECTOR_INDEX_NAME"],
-            vectors=vectors,
-        )
-        print(f"● Successfully stored {len(vectors)} vectors")
+        with ThreadPoolExecutor(max_workers=PUT_MAX_WORKERS) as executor:
+            stored = sum(executor.map(
+                lambda batch: put_vector_batch(s3vectors_client, bucket, index, batch),
+                batched(vectors, PUT_BATCH_SIZE),
+            ))
+        if stored < len(vectors):
+            raise RuntimeError(f"Stored only {stored} of {len(vectors)} vectors")
+        print(f"● Successfully stored {stored} vectors")
     except Exception as e:
         print(f"Error storing vectors: {e}")
         raise
@@ -128,21 +316,27 @@ def handler(event, context):
     """Lambda handler for vector creation."""
     try:
         # For Lambda deployment, load from event or use sample data
-        if event.get("source_text") and event.get("title"):
-            source_text = event["source_text"]
-            title = event["title"]
+        if event.get("documents"):
+            documents = [(doc["source_text"], doc["title"]) for doc in event["documents"]]
+        elif event.get("source_text") and event.get("title"):
+            documents = [(event["source_text"], event["title"])]
         else:
             # Use sample data for demonstration
-            source_text, title = load_sample_data()
+            documents = [load_sample_data()]
+        
+        create_index(documents)
         
-        create_index(source_text, title)
+        body = {
+            "message": "Vector index created successfully",
+            "titles": [title for _, title in documents],
+        }
+        # Single-document requests keep the original "title" field for existing callers
+        if len(documents) == 1:
+            body["title"] = documents[0][1]
         
         return {
             "statusCode": 200,
-            "body": json.dumps({
-                "message": "Vector index created successfully",
-                "title": title
-            }, ensure_ascii=False)
+            "body": json.dumps(body, ensure_ascii=False)
         }
         
     except Exception as e:
@@ -160,5 +354,4 @@ if __name__ == "__main__":
     os.environ["VECTOR_BUCKET_NAME"] = "shakespeare-rag-vector-bucket"
     os.environ["VECTOR_INDEX_NAME"] = "hamlet-shakespeare-index"
     
-    source_text, title = load_sample_data()
-    create_index(source_text, title)
+    create_index([load_sample_data()])
@@ -1,14 +1,41 @@
+import io
 import json
+import logging
 import os
 import re
+import threading
 import boto3
+from botocore.config import Config
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import List, Dict, Tuple, Optional
-from langchain_aws.embeddings import BedrockEmbeddings
 
 VECTOR_BUCKET_NAME = os.environ["VECTOR_BUCKET_NAME"]
 VECTOR_INDEX_NAME = os.environ["VECTOR_INDEX_NAME"]
 
+logger = logging.getLogger()
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# Clients are created once per container so warm invocations reuse them
+_BOTO_CONFIG = Config(
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 3},
+    max_pool_connections=20,
+)
+_BEDROCK = boto3.client("bedrock-runtime", "us-east-1", config=_BOTO_CONFIG)
+_S3VEC = boto3.client("s3vectors", "us-east-1", config=_BOTO_CONFIG)
+
+# Patterns used on every request, compiled once at import
+_TAG_RE = re.compile(r'<[^>]*>')
+_ALLOW_RE = re.compile(r'[^\w\s\.\?\!\,\-\'\"]')
+# ASCII characters _ALLOW_RE would strip, for a C-speed str.translate fast path
+_ASCII_DELETE_TABLE = {c: None for c in range(128) if _ALLOW_RE.match(chr(c))}
+_KEY_RE = re.compile(r'^[a-zA-Z0-9]{20,50}$')
+_SUSPICIOUS_RE = re.compile(
+    r'<script|javascript:|eval\(|exec\(|import\s+os|__import__',
+    re.IGNORECASE,
+)
+
 
 def sanitise_input(text: str) -> str:
     """Sanitise input text to prevent injection attacks."""
@@ -16,25 +43,71 @@ def sanitise_input(text: str) -> str:
         raise ValueError("Input must be a string")
     
     # Remove potential script tags and malicious content
-    sanitised = re.sub(r'<[^>]*>', '', text)
-    sanitised = re.sub(r'[^\w\s\.\?\!\,\-\'\"]', '', sanitised)
+    sanitised = _TAG_RE.sub('', text)
+    if sanitised.isascii():
+        sanitised = sanitised.translate(_ASCII_DELETE_TABLE)
+    else:
+        # \w and \s are Unicode-aware, so non-ASCII input keeps the regex path
+        sanitised = _ALLOW_RE.sub('', sanitised)
     
     return sanitised.strip()
 
 
+def embed(text: str) -> List[float]:
+    """Embed text with Titan via a direct Bedrock invoke_model call."""
+    response = _BEDROCK.invoke_model(
+        modelId="amazon.titan-embed-text-v2:0",
+        contentType="application/json",
+        accept="application/json",
+        body=json.dumps({"inputText": text}),
+    )
+    return json.load(response["body"])["embedding"]
+
+
+# Question embeddings keyed by normalised text, kept for the life of the container
+_EMBED_CACHE_MAX = 1024
+_EMBED_CACHE: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+
+
+def _embed_cached(question: str) -> Tuple[Tuple[float, ...], bool]:
+    """Embed a question, reusing the result for repeats that differ only in case or spacing."""
+    key = question.strip().lower()
+    if key in _EMBED_CACHE:
+        _EMBED_CACHE.move_to_end(key)
+        return _EMBED_CACHE[key], True
+    # Titan sees the question as asked; only the cache key is normalised
+    vector = tuple(embed(question))
+    _EMBED_CACHE[key] = vector
+    if len(_EMBED_CACHE) > _EMBED_CACHE_MAX:
+        _EMBED_CACHE.popitem(last=False)
+    return vector, False
+
+
+def _warm_bedrock() -> None:
+    """Embed a throwaway string so _BEDROCK's pool holds an open TLS connection."""
+    try:
+        embed("warmup")
+    except Exception as e:
+        print(f"Bedrock warm-up failed: {str(e)}")
+
+
+# Open the Bedrock connection during init so the first request skips the handshake.
+# Init waits at most _WARMUP_WAIT seconds, so retries cannot push it past Lambda's 10 second limit.
+_WARMUP_WAIT = 2
+_warmup = threading.Thread(target=_warm_bedrock, daemon=True)
+_warmup.start()
+_warmup.join(timeout=_WARMUP_WAIT)
+
+
 def query_vectors(question: str) -> List[Dict]:
     """Query S3 Vectors for similar documents with enhanced error handling."""
     
     try:
-        # Initialize Bedrock client and embedding model
-        bedrock_client = boto3.client("bedrock-runtime", "us-east-1")
-        embedding_model = BedrockEmbeddings(
-            client=bedrock_client,
-            model_id="amazon.titan-embed-text-v2:0",
-        )
-        
-        # Generate embedding for the question
-        embedding = embedding_model.embed_query(question)
+        # Generate embedding for the question, reusing cached results for repeats
+        vector, cache_hit = _embed_cached(question)
+        embedding = list(vector)
+        cache_status = "hit" if cache_hit else "miss"
+        print(f"Embedding cache {cache_status} (size: {len(_EMBED_CACHE)}/{_EMBED_CACHE_MAX})")
         
     except Exception as e:
         print(f"Error generating embedding: {str(e)}")
@@ -42,8 +115,7 @@ def query_vectors(question: str) -> List[Dict]:
     
     try:
         # Query S3 Vectors
-        s3vectors_client = boto3.client("s3vectors", "us-east-1")
-        response = s3vectors_client.query_vectors(
+        response = _S3VEC.query_vectors(
             vectorBucketName=VECTOR_BUCKET_NAME,
             indexName=VECTOR_INDEX_NAME,
             queryVector={
@@ -56,10 +128,10 @@ def query_vectors(question: str) -> List[Dict]:
         
         return response.get("vectors", [])
         
-    except s3vectors_client.exceptions.ResourceNotFoundException:
+    except _S3VEC.exceptions.NotFoundException:
         print(f"Vector index not found: {VECTOR_INDEX_NAME}")
         raise RuntimeError("Vector database not initialised")
-    except s3vectors_client.exceptions.ValidationException as e:
+    except _S3VEC.exceptions.ValidationException as e:
         print(f"Invalid query parameters: {str(e)}")
         raise RuntimeError("Invalid query format")
     except Exception as e:
@@ -74,12 +146,15 @@ def generate_response(question: str, context_docs: List[Dict]) -> str:
         return "No relevant context found for your question."
     
     try:
-        # Format documents as simple text context
-        context_text = "\n\n".join([
-            f"Document {i+1}:\n{doc['metadata']['text']}"
-            for i, doc in enumerate(context_docs)
-            if 'metadata' in doc and 'text' in doc['metadata']
-        ])
+        # Format documents as simple text context in a single growing buffer
+        buf = io.StringIO()
+        for i, doc in enumerate(context_docs):
+            if 'metadata' in doc and 'text' in doc['metadata']:
+                if buf.tell():
+                    buf.write("\n\n")
+                buf.write(f"Document {i+1}:\n")
+                buf.write(doc['metadata']['text'])
+        context_text = buf.getvalue()
         
         if not context_text:
             return "Context documents are malformed or empty."
@@ -97,9 +172,6 @@ def generate_response(question: str, context_docs: List[Dict]) -> str:
         # Combine system and user prompts
         full_prompt = f"{system_prompt}\n\nHuman: {user_prompt}\n\nAssistant:"
         
-        # Use direct Bedrock API call
-        bedrock_client = boto3.client("bedrock-runtime", "us-east-1")
-        
         # Prepare the request body for Titan Text
         request_body = {
             "inputText": full_prompt,
@@ -111,7 +183,7 @@ def generate_response(question: str, context_docs: List[Dict]) -> str:
         }
         
         # Call Bedrock directly
-        response = bedrock_client.invoke_model(
+        response = _BEDROCK.invoke_model(
             modelId="amazon.titan-text-premier-v1:0",
             contentType="application/json",
             accept="application/json",
@@ -119,7 +191,7 @@ def generate_response(question: str, context_docs: List[Dict]) -> str:
         )
         
         # Parse the response
-        response_body = json.loads(response["body"].read())
+        response_body = json.load(response["body"])
         
         # Titan Text response format
         if "results" in response_body and len(response_body["results"]) > 0:
@@ -129,10 +201,10 @@ def generate_response(question: str, context_docs: List[Dict]) -> str:
         
         return generated_text
         
-    except bedrock_client.exceptions.ThrottlingException:
+    except _BEDROCK.exceptions.ThrottlingException:
         print("Bedrock API throttling encountered")
         raise RuntimeError("Service temporarily unavailable due to high demand")
-    except bedrock_client.exceptions.ValidationException as e:
+    except _BEDROCK.exceptions.ValidationException as e:
         print(f"Invalid Bedrock request: {str(e)}")
         raise RuntimeError("Invalid request format")
     except Exception as e:
@@ -140,19 +212,16 @@ def generate_response(question: str, context_docs: List[Dict]) -> str:
         raise RuntimeError("Failed to generate response")
 
 
-def validate_api_key(event: Dict) -> Tuple[bool, str]:
-    """Validate API key from request headers."""
-    
-    headers = event.get("headers", {})
+def validate_api_key(headers: Dict) -> Tuple[bool, str]:
+    """Validate API key from request headers (keys already lowercased)."""
     
-    # API Gateway passes headers in lowercase
-    api_key = headers.get("x-api-key") or headers.get("X-Api-Key")
+    api_key = headers.get("x-api-key")
     
     if not api_key:
         return False, "Missing API key in request headers"
     
     # Basic validation - ensure it's alphanumeric and reasonable length
-    if not re.match(r'^[a-zA-Z0-9]{20,50}$', api_key):
+    if not _KEY_RE.match(api_key):
         return False, "Invalid API key format"
     
     # Log API key usage (first 8 characters only for security)
@@ -179,18 +248,8 @@ def validate_question(question: str) -> Tuple[bool, str]:
         return False, "Question must be less than 500 characters"
     
     # Check for potentially malicious content
-    suspicious_patterns = [
-        r'<script',
-        r'javascript:',
-        r'eval\(',
-        r'exec\(',
-        r'import\s+os',
-        r'__import__'
-    ]
-    
-    for pattern in suspicious_patterns:
-        if re.search(pattern, question, re.IGNORECASE):
-            return False, "Question contains prohibited content"
+    if _SUSPICIOUS_RE.search(question):
+        return False, "Question contains prohibited content"
     
     return True, "Valid question"
 
@@ -216,21 +275,25 @@ def handler(event, context):
     """Main Lambda handler for RAG queries with comprehensive error handling."""
     
     try:
-        # Log request details for monitoring (sanitised)
-        sanitised_event = {
-            "httpMethod": event.get("httpMethod"),
-            "path": event.get("path"),
-            "headers": {k: "***" if k.lower() in ["authorization", "x-api-key"] else v 
-                       for k, v in event.get("headers", {}).items()}
-        }
-        print(f"Received request: {json.dumps(sanitised_event)}")
+        # Header names may arrive in any case, so normalise them once up front
+        headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+        
+        # Log request details for monitoring (sanitised), only when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            sanitised_event = {
+                "httpMethod": event.get("httpMethod"),
+                "path": event.get("path"),
+                "headers": {k: "***" if k in ["authorization", "x-api-key"] else v 
+                           for k, v in headers.items()}
+            }
+            logger.debug("Received request: %s", json.dumps(sanitised_event))
         
         # Handle CORS preflight requests
         if event.get("httpMethod") == "OPTIONS":
             return create_response(200, {"message": "CORS preflight response"})
         
         # Validate API key
-        is_valid_key, key_message = validate_api_key(event)
+        is_valid_key, key_message = validate_api_key(headers)
         if not is_valid_key:
             print(f"API key validation failed: {key_message}")
             return create_response(401, {"error": "Unauthorised", "message": key_message})
@@ -253,7 +316,7 @@ def handler(event, context):
         
         # Sanitise question
         question = sanitise_input(question)
-        print(f"Processing sanitised question: {question}")
+        logger.debug("Processing sanitised question: %s", question)
         
         # Query vectors for similar documents
         try:
@@ -279,7 +342,7 @@ def handler(event, context):
         # Generate response using the context
         try:
             answer = generate_response(question, context_docs)
-            print(f"Generated response: {answer[:100]}...")
+            logger.debug("Generated response: %.100s...", answer)
         except RuntimeError as e:
             return create_response(503, {
                 "error": "Response generation failed",
@@ -290,16 +353,16 @@ def handler(event, context):
         sources = []
         for doc in context_docs:
             try:
-                metadata = doc.get('metadata', {})
-                source = {
-                    "title": metadata.get("title", "Unknown"),
-                    "distance": float(doc.get("distance", 0.0)),
-                    "relevance_score": round(1.0 - float(doc.get("distance", 0.0)), 3)
-                }
-                sources.append(source)
-            except (KeyError, TypeError, ValueError) as e:
+                distance = float(doc.get("distance", 0.0))
+            except (TypeError, ValueError) as e:
                 print(f"Error processing source: {e}")
                 continue
+            metadata = doc.get('metadata') or {}
+            sources.append({
+                "title": metadata.get("title", "Unknown"),
+                "distance": distance,
+                "relevance_score": round(1.0 - distance, 3)
+            })
         
         response_body = {
             "answer": answer,
@@ -1,75 +1,562 @@
 import os
 import argparse
+import asyncio
+import atexit
 import json
+import hashlib
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, nullcontext, redirect_stdout
+from functools import lru_cache, wraps
+from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
 
-import boto3
-from langchain_aws.embeddings import BedrockEmbeddings
+import numpy as np
 
+# boto3 and langchain_aws are imported where used so --help and argument errors stay fast
+if TYPE_CHECKING:
+    from langchain_aws.embeddings import BedrockEmbeddings
 
-def query_vectors(question: str, vector_bucket: str, index_name: str, top_k: int = 3) -> None:
-    """Query S3 Vectors and display results."""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+CACHE_DIR = Path(os.environ.get("RAG_CACHE_DIR", Path.home() / ".cache" / "rag-s3-vectors"))
+SEMANTIC_CACHE_PATH = CACHE_DIR / "semantic_cache.npz"
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = 0.97
+# Entries older than this are ignored so re-indexed data shows up without clearing the cache
+SEMANTIC_CACHE_TTL = 3600
+BATCH_MAX_WORKERS = 16
+NEGATIVE_CACHE_TTL = 30
+# Errors tied to the bucket/index itself, which recur until it is fixed. Validation
+# errors are left out as they often stem from request parameters such as top_k
+NEGATIVE_CACHE_CODES = {"NotFoundException"}
+ASYNC_MAX_CONNECTIONS = 100
+
+# Shared read-only defaults for result fields, so misses don't allocate a fresh dict
+_EMPTY = MappingProxyType({})
+_DEFAULT_DISTANCE = 0.0
+
+# Recent (unit query embedding, results, stored-at timestamp) entries per (bucket, index, top_k, return_metadata)
+SemanticScope = Tuple[str, str, int, bool]
+_semantic_cache: Optional[Dict[SemanticScope, Deque[Tuple[np.ndarray, List[Dict], float]]]] = None
+
+
+@lru_cache(maxsize=None)
+def _install_orjson_codec() -> None:
+    """Route botocore's JSON request/response handling through orjson when installed."""
+    if orjson is None:
+        return
+    
+    import botocore.parsers
+    import botocore.serialize
     
-    print(f"🔍 Searching for: {question}")
-    print(f"📦 Vector Bucket: {vector_bucket}")
-    print(f"📊 Index: {index_name}")
-    print("-" * 50)
+    def loads(s, **kwargs):
+        return json.loads(s, **kwargs) if kwargs else orjson.loads(s)
     
-    # Initialize Bedrock client and embedding model
-    bedrock_client = boto3.client("bedrock-runtime", "us-east-1")
-    embedding_model = BedrockEmbeddings(
-        client=bedrock_client,
-        model_id="amazon.titan-embed-text-v2:0",
+    def dumps(obj, **kwargs):
+        if not kwargs:
+            try:
+                return orjson.dumps(obj).decode()
+            except TypeError:
+                pass
+        return json.dumps(obj, **kwargs)
+    
+    # Only the module-level json references inside botocore are swapped. Anything
+    # orjson cannot handle (keyword options, unsupported types) falls back to stdlib
+    shim = SimpleNamespace(**{**vars(json), "loads": loads, "dumps": dumps})
+    botocore.parsers.json = shim
+    botocore.serialize.json = shim
+
+
+def _boto_config(max_pool_connections: int = 32):
+    """Client settings: adaptive retries back off on throttling, keepalive reuses sockets."""
+    from botocore.config import Config
+    
+    return Config(
+        retries={"mode": "adaptive", "max_attempts": 4},
+        tcp_keepalive=True,
+        connect_timeout=3,
+        read_timeout=30,
+        max_pool_connections=max_pool_connections,
     )
+
+
+def _build_once(factory):
+    """Cache a factory's result per arguments; unlike lru_cache, racing first calls build once."""
+    results = {}
+    locks = {}
+    guard = threading.Lock()
+    
+    @wraps(factory)
+    def wrapper(*args):
+        if args in results:
+            return results[args]
+        # One lock per argument tuple, so different clients can still be built in parallel
+        with guard:
+            lock = locks.setdefault(args, threading.Lock())
+        with lock:
+            if args not in results:
+                results[args] = factory(*args)
+            return results[args]
     
+    return wrapper
+
+
+@_build_once
+def _client(service: str, region: str = "us-east-1"):
+    """Build each boto3 client once so later calls reuse its connection pool."""
+    import boto3
+    
+    _install_orjson_codec()
+    # The default session is not thread-safe, and clients may be built on worker threads
+    return boto3.session.Session().client(service, region, config=_boto_config())
+
+
+def _open_cache() -> sqlite3.Connection:
+    """Open (creating if needed) the on-disk embedding and error cache."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CACHE_DIR / "embeddings.db")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS emb(key BLOB PRIMARY KEY, vec BLOB)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS neg("
+        "bucket TEXT, idx TEXT, code TEXT, message TEXT, ts REAL, PRIMARY KEY (bucket, idx))"
+    )
+    return conn
+
+
+def check_negative_cache(vector_bucket: str, index_name: str) -> None:
+    """Fail fast if this bucket/index returned a non-retryable error moments ago."""
     try:
-        # Generate embedding for the question
-        print("🧠 Generating embedding...")
-        embedding = embedding_model.embed_query(question)
-        print(f"✅ Embedding generated (dimension: {len(embedding)})")
-        
-        # Query S3 Vectors
-        print("🔎 Querying vectors...")
-        s3vectors_client = boto3.client("s3vectors", "us-east-1")
-        response = s3vectors_client.query_vectors(
-            vectorBucketName=vector_bucket,
-            indexName=index_name,
-            queryVector={
-                "float32": embedding,
-            },
-            topK=top_k,
-            returnMetadata=True,
-            returnDistance=True,
+        with closing(_open_cache()) as conn:
+            row = conn.execute(
+                "SELECT code, message, ts FROM neg WHERE bucket = ? AND idx = ?",
+                (vector_bucket, index_name),
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        return
+    
+    if row and time.time() - row[2] < NEGATIVE_CACHE_TTL:
+        code, message, ts = row
+        raise RuntimeError(f"{code} (cached {time.time() - ts:.0f}s ago): {message}")
+
+
+def record_negative_result(vector_bucket: str, index_name: str, error: Exception) -> None:
+    """Remember a non-retryable S3 Vectors error for NEGATIVE_CACHE_TTL seconds."""
+    from botocore.exceptions import ClientError
+    
+    if not isinstance(error, ClientError):
+        return
+    code = error.response.get("Error", {}).get("Code", "")
+    if code not in NEGATIVE_CACHE_CODES:
+        return
+    
+    try:
+        with closing(_open_cache()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO neg (bucket, idx, code, message, ts) VALUES (?, ?, ?, ?, ?)",
+                (vector_bucket, index_name, code, str(error), time.time()),
+            )
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Error cache write failed: {str(e)}")
+
+
+@_build_once
+def _get_embedding_model() -> "BedrockEmbeddings":
+    """Build the embedding model once per process, shared by queries and the embedding test."""
+    from langchain_aws.embeddings import BedrockEmbeddings
+    
+    return BedrockEmbeddings(
+        client=_client("bedrock-runtime"),
+        model_id=EMBEDDING_MODEL_ID,
+    )
+
+
+def get_or_compute_embedding(embedding_model: "BedrockEmbeddings", text: str) -> np.ndarray:
+    """Return the embedding for text, consulting the on-disk cache before Bedrock."""
+    key = hashlib.sha256(f"{EMBEDDING_MODEL_ID}\0{text}".encode("utf-8")).digest()
+    
+    # A broken cache should never stop a query, so failures fall through to Bedrock
+    try:
+        with closing(_open_cache()) as conn:
+            row = conn.execute("SELECT vec FROM emb WHERE key = ?", (key,)).fetchone()
+        if row:
+            print("💾 Embedding loaded from cache")
+            return np.frombuffer(row[0], dtype=np.float32)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Embedding cache read failed: {str(e)}")
+    
+    embedding = np.asarray(embedding_model.embed_query(text), dtype=np.float32)
+    
+    try:
+        with closing(_open_cache()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO emb (key, vec) VALUES (?, ?)",
+                (key, embedding.tobytes()),
+            )
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Embedding cache write failed: {str(e)}")
+    
+    return embedding
+
+
+def _unit(embedding: np.ndarray) -> np.ndarray:
+    """L2-normalise an embedding so a dot product gives cosine similarity."""
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def _load_semantic_cache() -> Dict[SemanticScope, Deque[Tuple[np.ndarray, List[Dict], float]]]:
+    """Load unexpired semantic cache entries from disk on first use."""
+    global _semantic_cache
+    if _semantic_cache is not None:
+        return _semantic_cache
+    
+    _semantic_cache = {}
+    atexit.register(_save_semantic_cache)
+    try:
+        cutoff = time.time() - SEMANTIC_CACHE_TTL
+        with np.load(SEMANTIC_CACHE_PATH) as data:
+            rows = zip(data["scopes"], data["embeddings"], data["responses"], data["timestamps"])
+            for scope, vec, vectors, ts in rows:
+                if ts < cutoff:
+                    continue
+                entries = _semantic_cache.setdefault(
+                    tuple(json.loads(str(scope))), deque(maxlen=SEMANTIC_CACHE_SIZE)
+                )
+                entries.append((vec, json.loads(str(vectors)), float(ts)))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        # A truncated or otherwise unreadable file is discarded rather than failing every run
+        print(f"⚠️  Semantic cache could not be loaded, discarding it: {str(e)}")
+        _semantic_cache = {}
+        try:
+            SEMANTIC_CACHE_PATH.unlink(missing_ok=True)
+        except OSError:
+            pass
+    return _semantic_cache
+
+
+def _save_semantic_cache() -> None:
+    """Persist the semantic cache; strings only, so loading never needs pickle."""
+    cutoff = time.time() - SEMANTIC_CACHE_TTL
+    rows = [
+        (json.dumps(scope), vec, json.dumps(vectors, default=str), ts)
+        for scope, entries in (_semantic_cache or {}).items()
+        for vec, vectors, ts in entries
+        if ts >= cutoff
+    ]
+    if not rows:
+        return
+    tmp_path = None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        scopes, embeddings, responses, timestamps = zip(*rows)
+        # Write to a temp file and swap it in, so readers never see a partial file
+        with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix=".npz", delete=False) as f:
+            tmp_path = f.name
+            np.savez(
+                f,
+                scopes=np.array(scopes),
+                embeddings=np.stack(embeddings),
+                responses=np.array(responses),
+                timestamps=np.array(timestamps, dtype=np.float64),
+            )
+        os.replace(tmp_path, SEMANTIC_CACHE_PATH)
+    except OSError as e:
+        print(f"⚠️  Semantic cache could not be saved: {str(e)}")
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def lookup_semantic_cache(scope: SemanticScope, embedding: np.ndarray) -> Optional[List[Dict]]:
+    """Return cached results for a near-duplicate question, if one is close and fresh enough."""
+    cutoff = time.time() - SEMANTIC_CACHE_TTL
+    entries = [entry for entry in _load_semantic_cache().get(scope, ()) if entry[2] >= cutoff]
+    if not entries:
+        return None
+    
+    sims = np.stack([vec for vec, _, _ in entries]) @ _unit(embedding)
+    best = int(sims.argmax())
+    if sims[best] < SEMANTIC_CACHE_THRESHOLD:
+        return None
+    
+    print(f"♻️  Reusing results from a similar question (similarity: {sims[best]:.4f})")
+    return entries[best][1]
+
+
+def store_semantic_cache(scope: SemanticScope, embedding: np.ndarray, vectors: List[Dict]) -> None:
+    """Remember results for a question, evicting the oldest entry when full."""
+    entries = _load_semantic_cache().setdefault(scope, deque(maxlen=SEMANTIC_CACHE_SIZE))
+    entries.append((_unit(embedding), vectors, time.time()))
+
+
+@lru_cache(maxsize=1024)
+def _embed(text: str) -> np.ndarray:
+    """Memoise embeddings in-process, in front of the on-disk cache."""
+    embedding = get_or_compute_embedding(_get_embedding_model(), text)
+    # Cached arrays are shared between callers, so guard them against mutation
+    embedding.flags.writeable = False
+    return embedding
+
+
+def _query_params(embedding: np.ndarray, vector_bucket: str, index_name: str, top_k: int, return_metadata: bool) -> Dict:
+    """Build query_vectors keyword arguments shared by the sync and async clients."""
+    return {
+        "vectorBucketName": vector_bucket,
+        "indexName": index_name,
+        "queryVector": {
+            # Round-trip through float32's shortest strings; a bare .tolist() would
+            # serialise every value with float64's 17 digits
+            "float32": embedding.astype(str).astype(np.float64).tolist(),
+        },
+        "topK": top_k,
+        "returnMetadata": return_metadata,
+        "returnDistance": True,
+    }
+
+
+def search_vectors(embedding: np.ndarray, vector_bucket: str, index_name: str, top_k: int, return_metadata: bool = True) -> List[Dict]:
+    """Run a single S3 Vectors similarity query for an embedding."""
+    try:
+        response = _client("s3vectors").query_vectors(
+            **_query_params(embedding, vector_bucket, index_name, top_k, return_metadata)
         )
+    except Exception as e:
+        record_negative_result(vector_bucket, index_name, e)
+        raise
+    return response["vectors"]
+
+
+async def search_vectors_async(embeddings: List[np.ndarray], vector_bucket: str, index_name: str, top_k: int, return_metadata: bool = True) -> List[List[Dict]]:
+    """Run many S3 Vectors queries concurrently on one event loop and connection pool."""
+    from aiobotocore.session import get_session
+    
+    _install_orjson_codec()
+    session = get_session()
+    async with session.create_client(
+        "s3vectors",
+        "us-east-1",
+        config=_boto_config(ASYNC_MAX_CONNECTIONS),
+    ) as s3vectors_client:
+        try:
+            responses = await asyncio.gather(*(
+                s3vectors_client.query_vectors(
+                    **_query_params(embedding, vector_bucket, index_name, top_k, return_metadata)
+                )
+                for embedding in embeddings
+            ))
+        except Exception as e:
+            record_negative_result(vector_bucket, index_name, e)
+            raise
+    return [response["vectors"] for response in responses]
+
+
+def distance_stats(vectors: List[Dict]) -> Dict[str, float]:
+    """Summarise result distances as best, worst and average for JSON output."""
+    if not vectors:
+        return {}
+    distances = np.fromiter(
+        (v.get("distance", _DEFAULT_DISTANCE) for v in vectors), dtype=np.float64, count=len(vectors)
+    )
+    return {
+        "best": float(distances.min()),
+        "worst": float(distances.max()),
+        "average": float(distances.mean()),
+    }
+
+
+def write_json(payload: Dict, stream) -> None:
+    """Serialise a payload to stream, using orjson when it is installed."""
+    if orjson is not None:
+        stream.write(orjson.dumps(payload, default=str).decode())
+    else:
+        json.dump(payload, stream, default=str, ensure_ascii=False)
+    stream.write("\n")
+
+
+def display_results(vectors: List[Dict], show_metadata: bool = True) -> None:
+    """Print each result followed by distance statistics in a single write."""
+    
+    separator = "-" * 50
+    out = []
+    
+    # Distance statistics are accumulated here rather than in a second pass
+    d_min, d_max, d_sum, n = float("inf"), float("-inf"), 0.0, 0
+    for i, vector in enumerate(vectors, 1):
+        distance = vector.get("distance", _DEFAULT_DISTANCE)
+        key = vector.get("key", "Unknown")
+        d_min = distance if distance < d_min else d_min
+        d_max = distance if distance > d_max else d_max
+        d_sum += distance
+        n += 1
+        
+        if not show_metadata:
+            out.append(
+                f"📄 Result {i}\n"
+                f"   Distance: {distance:.4f}\n"
+                f"   Key: {key}\n"
+                f"{separator}\n"
+            )
+            continue
         
-        vectors = response["vectors"]
-        print(f"✅ Found {len(vectors)} similar documents")
-        print("=" * 50)
+        metadata = vector.get("metadata", _EMPTY)
+        text = metadata.get("text", "No text available")
+        title = metadata.get("title", "Unknown")
+        preview = text if len(text) <= 200 else text[:200] + "..."
         
-        # Display results
-        for i, vector in enumerate(vectors, 1):
-            metadata = vector.get("metadata", {})
-            distance = vector.get("distance", 0.0)
-            text = metadata.get("text", "No text available")
-            title = metadata.get("title", "Unknown")
+        out.append(
+            f"📄 Result {i}\n"
+            f"   Title: {title}\n"
+            f"   Distance: {distance:.4f}\n"
+            f"   Key: {key}\n"
+            f"   Text Preview: {preview}\n"
+            f"{separator}\n"
+        )
+    
+    # Summary statistics
+    if n:
+        out.append(
+            f"📊 Distance Statistics:\n"
+            f"   Best Match: {d_min:.4f}\n"
+            f"   Worst Match: {d_max:.4f}\n"
+            f"   Average: {d_sum / n:.4f}\n"
+        )
+    
+    sys.stdout.write("".join(out))
+
+
+def query_vectors(question: str, vector_bucket: str, index_name: str, top_k: int = 3, json_mode: bool = False, return_metadata: bool = True) -> None:
+    """Query S3 Vectors and display results."""
+    
+    # In JSON mode progress goes to stderr so stdout carries only the document
+    stdout = sys.stdout
+    with redirect_stdout(sys.stderr) if json_mode else nullcontext():
+        print(f"🔍 Searching for: {question}")
+        print(f"📦 Vector Bucket: {vector_bucket}")
+        print(f"📊 Index: {index_name}")
+        print("-" * 50)
+        
+        try:
+            # Skip Bedrock and S3 Vectors entirely if this index just failed
+            check_negative_cache(vector_bucket, index_name)
+            
+            # Generate embedding for the question while the S3 Vectors client is built
+            print("🧠 Generating embedding...")
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                s3vectors_future = executor.submit(_client, "s3vectors")
+                embedding = _embed(question)
+                s3vectors_future.result()
+            print(f"✅ Embedding generated (dimension: {len(embedding)})")
             
-            print(f"📄 Result {i}")
-            print(f"   Title: {title}")
-            print(f"   Distance: {distance:.4f}")
-            print(f"   Key: {vector.get('key', 'Unknown')}")
-            print(f"   Text Preview: {text[:200]}{'...' if len(text) > 200 else ''}")
-            print("-" * 50)
+            # Query S3 Vectors, unless a near-identical question was answered recently
+            scope = (vector_bucket, index_name, top_k, return_metadata)
+            vectors = lookup_semantic_cache(scope, embedding)
+            
+            if vectors is None:
+                print("🔎 Querying vectors...")
+                vectors = search_vectors(embedding, vector_bucket, index_name, top_k, return_metadata)
+                store_semantic_cache(scope, embedding, vectors)
+            
+            print(f"✅ Found {len(vectors)} similar documents")
+            
+            if json_mode:
+                write_json({"question": question, "results": vectors, "stats": distance_stats(vectors)}, stdout)
+                return
+            
+            print("=" * 50)
+            display_results(vectors, return_metadata)
+            
+        except Exception as e:
+            print(f"❌ Error during query: {str(e)}")
+            raise
+
+
+def query_vectors_batch(questions: List[str], vector_bucket: str, index_name: str, top_k: int = 3, json_mode: bool = False, use_async: bool = False, return_metadata: bool = True) -> None:
+    """Query S3 Vectors for many questions concurrently and display results in order."""
+    
+    stdout = sys.stdout
+    with redirect_stdout(sys.stderr) if json_mode else nullcontext():
+        print(f"🔍 Searching for {len(questions)} questions")
+        print(f"📦 Vector Bucket: {vector_bucket}")
+        print(f"📊 Index: {index_name}")
+        print("-" * 50)
         
-        # Summary statistics
-        if vectors:
-            distances = [v.get("distance", 0.0) for v in vectors]
-            print(f"📊 Distance Statistics:")
-            print(f"   Best Match: {min(distances):.4f}")
-            print(f"   Worst Match: {max(distances):.4f}")
-            print(f"   Average: {sum(distances) / len(distances):.4f}")
+        scope = (vector_bucket, index_name, top_k, return_metadata)
         
-    except Exception as e:
-        print(f"❌ Error during query: {str(e)}")
-        raise
+        try:
+            check_negative_cache(vector_bucket, index_name)
+            
+            # The work is network-bound, so threads overlap the Bedrock and S3 Vectors calls
+            with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+                print("🧠 Generating embeddings...")
+                embeddings = list(executor.map(_embed, questions))
+                print(f"✅ {len(embeddings)} embeddings generated")
+                
+                print("🔎 Querying vectors...")
+                results = [lookup_semantic_cache(scope, embedding) for embedding in embeddings]
+                missing = [i for i, vectors in enumerate(results) if vectors is None]
+                
+                if use_async:
+                    fetched = asyncio.run(search_vectors_async(
+                        [embeddings[i] for i in missing], vector_bucket, index_name, top_k, return_metadata
+                    ))
+                else:
+                    fetched = [
+                        future.result()
+                        for future in [
+                            executor.submit(search_vectors, embeddings[i], vector_bucket, index_name, top_k, return_metadata)
+                            for i in missing
+                        ]
+                    ]
+                
+                for i, vectors in zip(missing, fetched):
+                    results[i] = vectors
+                    store_semantic_cache(scope, embeddings[i], vectors)
+            
+            if json_mode:
+                write_json({"results": [
+                    {"question": question, "results": vectors, "stats": distance_stats(vectors)}
+                    for question, vectors in zip(questions, results)
+                ]}, stdout)
+                return
+            
+            for question, vectors in zip(questions, results):
+                print("=" * 50)
+                print(f"🔍 Question: {question}")
+                print(f"✅ Found {len(vectors)} similar documents")
+                print("=" * 50)
+                display_results(vectors, return_metadata)
+            
+        except Exception as e:
+            print(f"❌ Error during batch query: {str(e)}")
+            raise
+
+
+def _warm_up(vector_bucket: str) -> None:
+    """Build clients and open the S3 Vectors connection ahead of the first query."""
+    try:
+        _get_embedding_model()
+        _client("s3vectors").list_indexes(vectorBucketName=vector_bucket, maxResults=1)
+    except Exception:
+        # Best effort only; the real query reports any genuine problem
+        pass
 
 
 def test_embeddings() -> None:
@@ -77,11 +564,8 @@ def test_embeddings() -> None:
     
     print("🧪 Testing embedding generation...")
     
-    bedrock_client = boto3.client("bedrock-runtime", "us-east-1")
-    embedding_model = BedrockEmbeddings(
-        client=bedrock_client,
-        model_id="amazon.titan-embed-text-v2:0",
-    )
+    # Shares the query path's model, but calls it directly so the caches are bypassed
+    embedding_model = _get_embedding_model()
     
     test_text = "This is a test sentence for embedding generation."
     
@@ -105,7 +589,11 @@ def main():
     parser.add_argument("-b", "--bucket", type=str, help="Vector bucket name")
     parser.add_argument("-i", "--index", type=str, help="Vector index name")
     parser.add_argument("-k", "--top-k", type=int, default=3, help="Number of results to return")
+    parser.add_argument("-f", "--questions-file", type=str, help="File of newline-delimited questions to query in one batch")
     parser.add_argument("--test-embeddings", action="store_true", help="Test embedding generation only")
+    parser.add_argument("--json", action="store_true", help="Write results as JSON to stdout")
+    parser.add_argument("--keys-only", action="store_true", help="Return only keys and distances, skipping stored metadata")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use an async S3 Vectors client for --questions-file batches")
     
     args = parser.parse_args()
     
@@ -114,8 +602,7 @@ def main():
         test_embeddings()
         return
     
-    # Get configuration from arguments or environment
-    question = args.question or input("Enter your question: ")
+    # Get configuration from arguments or environment, validating before any prompt
     bucket = args.bucket or os.environ.get("VECTOR_BUCKET_NAME")
     index = args.index or os.environ.get("VECTOR_INDEX_NAME")
     
@@ -127,8 +614,29 @@ def main():
         print("❌ Vector index name required (use -i flag or set VECTOR_INDEX_NAME env var)")
         return
     
+    questions = None
+    if args.questions_file:
+        with open(args.questions_file, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+    elif args.question:
+        question = args.question
+    else:
+        # Hide client setup and the TLS handshake behind the interactive prompt only;
+        # with -q or -f the query starts straight away and would just race the warm-up
+        threading.Thread(target=_warm_up, args=(bucket,), daemon=True).start()
+        question = input("Enter your question: ")
+    
     # Execute query
-    query_vectors(question, bucket, index, args.top_k)
+    if questions is not None:
+        query_vectors_batch(
+            questions, bucket, index, args.top_k,
+            json_mode=args.json, use_async=args.use_async, return_metadata=not args.keys_only,
+        )
+    else:
+        query_vectors(
+            question, bucket, index, args.top_k,
+            json_mode=args.json, return_metadata=not args.keys_only,
+        )
 
 
 if __name__ == "__main__":